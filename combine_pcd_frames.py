@@ -1,39 +1,148 @@
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 import open3d as o3d
 import numpy as np
 
-def combine_pcd_frames(folder_path, prefix="Record3 (Frame ", extension=".pcd"):
-    
+# Upper bound on concurrent PCD reads; Open3D releases the GIL while reading
+MAX_READ_WORKERS = 16
 
-    # List all files in the folder
-    all_files = os.listdir(folder_path)
+# Frame files are named "Record3 (Frame X).pcd"; the group captures the frame number
+FRAME_FILE_PATTERN = re.compile(r'^Record3 \(Frame (\d+)\)\.pcd$')
 
-    # Filter only those matching the pattern "Record3 (Frame X).pcd"
-    # We'll use a regex to extract the integer frame number.
-    pattern = re.compile(r'^Record3 \(Frame (\d+)\)\.pcd$')
+# Voxel indices are biased into 21 bits per axis so they pack into one int64 key
+VOXEL_KEY_BITS = 21
+VOXEL_KEY_BIAS = 1 << (VOXEL_KEY_BITS - 1)
 
-    valid_files = []
-    for f in all_files:
-        match = pattern.match(f)
-        if match:
-            # Extract frame number to sort properly
-            frame_num = int(match.group(1))
-            full_path = os.path.join(folder_path, f)
-            valid_files.append((frame_num, full_path))
+def _iter_point_clouds(file_paths):
+    """Read PCD files concurrently in batches, yielding the clouds in input order"""
+    if not file_paths:
+        return
+    workers = min(MAX_READ_WORKERS, len(file_paths))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Only one batch is held in memory at a time
+        for start in range(0, len(file_paths), workers):
+            yield from executor.map(o3d.io.read_point_cloud, file_paths[start:start + workers])
 
-    # Sort by the frame number
-    valid_files.sort(key=lambda x: x[0])
+def _read_point_clouds(file_paths):
+    """Read PCD files concurrently, returning the clouds in input order"""
+    return list(_iter_point_clouds(file_paths))
 
-    # Combine them
-    combined_pcd = o3d.geometry.PointCloud()
-    for frame_num, file_path in valid_files:
-        print(f"Loading frame {frame_num} -> {file_path}")
-        pcd = o3d.io.read_point_cloud(file_path)
-        combined_pcd += pcd
+def _stack_attribute(pcds, attribute, total):
+    """Copy one per-point attribute of every cloud into a single preallocated array"""
+    stacked = np.empty((total, 3), dtype=np.float64)
+    offset = 0
+    for pcd in pcds:
+        values = np.asarray(getattr(pcd, attribute))
+        stacked[offset:offset + len(values)] = values
+        offset += len(values)
+    return stacked
 
+def _merge_point_clouds(pcds):
+    """
+    Merge point clouds with a single copy instead of repeated +=
+
+    As with PointCloud.__iadd__, empty clouds (e.g. from an unreadable file) are
+    skipped, and colors and normals are kept only when every non-empty cloud
+    provides them.
+    """
+    combined_pcd = o3d.geometry.PointCloud()
+    pcds = [pcd for pcd in pcds if pcd.has_points()]
+    if not pcds:
+        return combined_pcd
+    total = sum(len(pcd.points) for pcd in pcds)
+    combined_pcd.points = o3d.utility.Vector3dVector(_stack_attribute(pcds, "points", total))
+    if all(pcd.has_colors() for pcd in pcds):
+        combined_pcd.colors = o3d.utility.Vector3dVector(_stack_attribute(pcds, "colors", total))
+    if all(pcd.has_normals() for pcd in pcds):
+        combined_pcd.normals = o3d.utility.Vector3dVector(_stack_attribute(pcds, "normals", total))
     return combined_pcd
 
+def _voxel_keys(points, voxel_size):
+    """Pack the voxel index of every point into a single int64 key"""
+    indices = np.floor(points / voxel_size).astype(np.int64) + VOXEL_KEY_BIAS
+    if indices.min() < 0 or indices.max() >= 1 << VOXEL_KEY_BITS:
+        raise ValueError(f"Point cloud extent is too large for voxel size {voxel_size}")
+    return (indices[:, 0] << (2 * VOXEL_KEY_BITS)) | (indices[:, 1] << VOXEL_KEY_BITS) | indices[:, 2]
+
+def _voxel_down_sample_streaming(pcds, voxel_size):
+    """
+    Voxel-downsample a stream of point clouds without building their union
+
+    Per-voxel sums and counts are folded in one frame at a time, so peak memory
+    is bounded by the number of occupied voxels plus a single frame. Each output
+    point is the centroid of its voxel, as with PointCloud.voxel_down_sample.
+    """
+    keys = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    sums = None
+    for pcd in pcds:
+        if not pcd.has_points():
+            continue
+        frame_attributes = {"points": np.asarray(pcd.points)}
+        if pcd.has_colors():
+            frame_attributes["colors"] = np.asarray(pcd.colors)
+        if pcd.has_normals():
+            frame_attributes["normals"] = np.asarray(pcd.normals)
+        # NaN/inf returns have no voxel; drop them along with their colors and normals
+        finite = np.isfinite(frame_attributes["points"]).all(axis=1)
+        if not finite.all():
+            if not finite.any():
+                continue
+            frame_attributes = {name: values[finite] for name, values in frame_attributes.items()}
+        if sums is None:
+            sums = {name: np.empty((0, 3)) for name in frame_attributes}
+        # Like +=, colors and normals survive only if every non-empty frame has them
+        sums = {name: total for name, total in sums.items() if name in frame_attributes}
+
+        frame_keys = _voxel_keys(frame_attributes["points"], voxel_size)
+        keys, inverse = np.unique(np.concatenate([keys, frame_keys]), return_inverse=True)
+        old_inverse, new_inverse = inverse[:len(counts)], inverse[len(counts):]
+
+        merged_counts = np.bincount(new_inverse, minlength=len(keys))
+        merged_counts[old_inverse] += counts
+        counts = merged_counts
+        for name, total in sums.items():
+            values = frame_attributes[name]
+            merged = np.column_stack([
+                np.bincount(new_inverse, weights=values[:, axis], minlength=len(keys))
+                for axis in range(3)
+            ])
+            merged[old_inverse] += total
+            sums[name] = merged
+
+    downsampled = o3d.geometry.PointCloud()
+    if sums is None:
+        return downsampled
+    downsampled.points = o3d.utility.Vector3dVector(sums["points"] / counts[:, None])
+    if "colors" in sums:
+        downsampled.colors = o3d.utility.Vector3dVector(sums["colors"] / counts[:, None])
+    if "normals" in sums:
+        norms = np.linalg.norm(sums["normals"], axis=1, keepdims=True)
+        downsampled.normals = o3d.utility.Vector3dVector(
+            np.divide(sums["normals"], norms, out=np.zeros_like(sums["normals"]), where=norms > 0))
+    return downsampled
+
+def combine_pcd_frames(folder_path, prefix="Record3 (Frame ", extension=".pcd"):
+    
+
+    # Keep only files matching the pattern "Record3 (Frame X).pcd", sorted by
+    # the integer frame number; the module-level pattern is compiled once and
+    # DirEntry.path already holds the full path, so no os.path.join is needed
+    with os.scandir(folder_path) as entries:
+        valid_files = sorted(
+            ((int(match.group(1)), entry.path)
+             for entry in entries
+             if (match := FRAME_FILE_PATTERN.match(entry.name))),
+            key=lambda x: x[0]
+        )
+
+    # Load the frames concurrently, then combine them in one pass
+    print(f"Loading {len(valid_files)} frames from {folder_path}")
+    pcds = _read_point_clouds([file_path for _, file_path in valid_files])
+
+    return _merge_point_clouds(pcds)
+
 def combine_pcd_files(file_paths, voxel_size=None):
     """
     Combine multiple PCD files into a single point cloud
@@ -48,17 +157,12 @@ def combine_pcd_files(file_paths, voxel_size=None):
     if not file_paths:
         raise ValueError("No PCD files provided")
     
-    # Combine all point clouds
-    combined_pcd = o3d.geometry.PointCloud()
-    for file_path in file_paths:
-        pcd = o3d.io.read_point_cloud(file_path)
-        combined_pcd += pcd
-    
-    # Optionally downsample
+    # Optionally downsample while merging, so the full cloud is never held in memory
     if voxel_size is not None and voxel_size > 0:
-        combined_pcd = combined_pcd.voxel_down_sample(voxel_size)
+        return _voxel_down_sample_streaming(_iter_point_clouds(file_paths), voxel_size)
     
-    return combined_pcd
+    # Combine all point clouds
+    return _merge_point_clouds(_read_point_clouds(file_paths))
 
 def save_combined_pcd(combined_pcd, output_path):
     """
@@ -71,7 +175,7 @@ def save_combined_pcd(combined_pcd, output_path):
     Returns:
         Path to the saved file
     """
-    o3d.io.write_point_cloud(output_path, combined_pcd)
+    o3d.io.write_point_cloud(output_path, combined_pcd, write_ascii=False, compressed=True)
     return output_path
 
 def main():
@@ -85,7 +189,7 @@ def main():
 
     # 3) Save to a new PCD file
     output_file = os.path.join(folder_path, "aggregated_scan_record3.pcd")
-    o3d.io.write_point_cloud(output_file, aggregated_cloud)
+    o3d.io.write_point_cloud(output_file, aggregated_cloud, write_ascii=False, compressed=True)
     print(f"Saved combined point cloud to: {output_file}")
 
     # 4) Optional: Visualize
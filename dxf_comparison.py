@@ -1,11 +1,16 @@
 import ezdxf
 import numpy as np
-# Don't import plt here, we'll handle plotting in the main thread
-import matplotlib
-from shapely.geometry import Polygon, LineString
+# Don't import plt here; reports are drawn on standalone figures
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+import shapely
+from shapely import affinity
+from shapely.geometry import Polygon
+from collections import OrderedDict
 from dataclasses import dataclass
 from PyQt5.QtCore import QThread, pyqtSignal
 import math
+import threading
 
 @dataclass
 class ComparisonMetrics:
@@ -21,6 +26,10 @@ class ComparisonMetrics:
 
 # Tolerance for detecting horizontal/vertical lines (in radians)
 AXIS_ALIGNMENT_TOLERANCE = 0.1
+# Segments shorter than this are ignored when detecting principal axes
+MIN_AXIS_SEGMENT_LENGTH = 0.1
+# Rotations and offsets smaller than this are treated as already aligned
+ALIGNMENT_EPSILON = 1e-9
 
 @dataclass
 class ComparisonResult:
@@ -30,6 +39,46 @@ class ComparisonResult:
     angle_differences: list
     iou_score: float
 
+# Number of polygons whose derived data is kept in each per-polygon cache
+POLYGON_CACHE_SIZE = 32
+_coords_cache = OrderedDict()
+_axis_cache = OrderedDict()
+_polygon_cache_lock = threading.Lock()
+
+def _cached_per_polygon(cache, polygon, compute):
+    """
+    Return compute(polygon), memoized in an LRU cache keyed by polygon identity.
+
+    Entries keep a reference to their polygon, so its id cannot be reused by
+    another object while the entry is alive.
+    """
+    key = id(polygon)
+    with _polygon_cache_lock:
+        entry = cache.get(key)
+        if entry is not None and entry[0] is polygon:
+            cache.move_to_end(key)
+            return entry[1]
+    value = compute(polygon)
+    with _polygon_cache_lock:
+        cache[key] = (polygon, value)
+        if len(cache) > POLYGON_CACHE_SIZE:
+            cache.popitem(last=False)
+    return value
+
+def _exterior_array(polygon):
+    coords = np.asarray(polygon.exterior.coords, dtype=float)[:, :2]
+    coords.flags.writeable = False
+    return coords
+
+def _coords(polygon):
+    """
+    Return the exterior ring of a polygon as a read-only (N, 2) array.
+
+    The array is cached per polygon object, so helpers that walk the same
+    polygon only copy its coordinates out of GEOS once.
+    """
+    return _cached_per_polygon(_coords_cache, polygon, _exterior_array)
+
 class ComparisonThread(QThread):
     finished = pyqtSignal(object)
     error_signal = pyqtSignal(str)
@@ -42,14 +91,15 @@ class ComparisonThread(QThread):
 
     def run(self):
         try:
-            # Compare the two DXF files
-            result = compare_floorplans_detailed(self.reference_dxf_path, self.extracted_dxf_path)
-            
-            # Load polygons and prepare data for visualization
+            # Load both polygons once and align them once for every comparison step
             reference_polygon = load_dxf_polygon(self.reference_dxf_path)
             extracted_polygon = load_dxf_polygon(self.extracted_dxf_path)
-            metrics = compare_floorplans(self.reference_dxf_path, self.extracted_dxf_path)
-            plot_data = prepare_comparison_data(reference_polygon, extracted_polygon, metrics)
+            aligned_polygon = align_polygons(reference_polygon, extracted_polygon)
+            
+            # Compare the two DXF files and prepare data for visualization
+            result = compare_floorplans_detailed(reference_polygon, extracted_polygon, aligned_polygon)
+            metrics = compare_floorplans(reference_polygon, extracted_polygon, aligned_polygon)
+            plot_data = prepare_comparison_data(reference_polygon, extracted_polygon, metrics, aligned_polygon)
             
             # Generate the comparison report
             report_path = 'comparison_report.pdf'
@@ -64,64 +114,70 @@ def load_dxf_polygon(dxf_path):
     doc = ezdxf.readfile(dxf_path)
     msp = doc.modelspace()
     
+    # Query only outline entities; a single query keeps them in drawing order.
+    # Dimension lines from export_floor_plan_to_dxf are not part of the outline
     vertices = []
-    for entity in msp:
+    for entity in msp.query('LWPOLYLINE LINE[layer!="DIMENSIONS"]'):
         if entity.dxftype() == 'LWPOLYLINE':
-            vertices.extend(entity.get_points())
-        elif entity.dxftype() == 'LINE':
-            vertices.extend([(entity.dxf.start[0], entity.dxf.start[1])])
-            vertices.extend([(entity.dxf.end[0], entity.dxf.end[1])])
-    
-    # Filter out any dimension lines or text entities
-   
-    
-    # Create and clean polygon
-    if vertices:
-        poly = Polygon(vertices)
-        if not poly.is_valid:
-            poly = poly.buffer(0)
+            vertices.extend(entity.get_points('xy'))
+        else:
+            start, end = entity.dxf.start, entity.dxf.end
+            vertices.append((start[0], start[1]))
+            vertices.append((end[0], end[1]))
+    
+    # Create and clean polygon; fewer than three vertices cannot form one
+    if len(vertices) < 3:
+        return None
+    poly = Polygon(np.asarray(vertices, dtype=float))
+    if poly.is_valid:
         return poly
-    return None
+    repaired = _largest_polygon(shapely.make_valid(poly))
+    if repaired is None:
+        # make_valid can collapse an outline to lines only; buffer(0) still recovers an area
+        repaired = _largest_polygon(poly.buffer(0))
+    return repaired
+
+def _largest_polygon(geometry):
+    """Reduce a repaired geometry to its largest polygon part, or None if it has none."""
+    # make_valid may nest a MultiPolygon inside a GeometryCollection, so flatten two levels
+    polygons = [
+        polygon
+        for part in shapely.get_parts(geometry)
+        for polygon in shapely.get_parts(part)
+        if polygon.geom_type == 'Polygon' and not polygon.is_empty
+    ]
+    return max(polygons, key=lambda part: part.area) if polygons else None
 
 def detect_principal_axes(polygon):
     """
     Detect the principal axes (main horizontal and vertical directions) of a polygon.
     Returns the angle (in radians) of the principal axis relative to the x-axis.
+    
+    The result is cached per polygon object, as align_polygons is typically
+    run several times against the same reference.
     """
-    coords = list(polygon.exterior.coords)
-    angles = []
-    
-    # Calculate angles of all segments
-    for i in range(len(coords) - 1):
-        p1, p2 = coords[i], coords[i+1]
-        dx, dy = p2[0] - p1[0], p2[1] - p1[1]
-        length = math.sqrt(dx*dx + dy*dy)
-        
-        # Skip very short segments
-        if length < 0.1:
-            continue
-            
-        # Calculate angle with x-axis (between -pi and pi)
-        angle = math.atan2(dy, dx)
-        
-        # Normalize angle to be between 0 and pi/2 
-        angle = abs(angle) % (math.pi/2)
-        angles.append(angle)
-    
-    angle_counts = {}  # Initialize the dictionary to store angle frequencies
-    # Find the most common angle 
-    for angle in angles:
-        # Round to nearest tolerance
-        key = round(angle / AXIS_ALIGNMENT_TOLERANCE) * AXIS_ALIGNMENT_TOLERANCE
-        angle_counts[key] = angle_counts.get(key, 0) + 1
-    
-    # Get the most common angle
-    if angle_counts:
-        principal_angle = max(angle_counts.items(), key=lambda x: x[1])[0]
-        return principal_angle
-    else:
+    return _cached_per_polygon(_axis_cache, polygon, _principal_axis_angle)
+
+def _principal_axis_angle(polygon):
+    deltas = np.diff(_coords(polygon), axis=0)
+    
+    # Skip very short segments; comparing squared lengths avoids a sqrt per segment
+    squared_lengths = np.einsum('ij,ij->i', deltas, deltas)
+    deltas = deltas[squared_lengths >= MIN_AXIS_SEGMENT_LENGTH ** 2]
+    if len(deltas) == 0:
         # Default to 0 if no angles found
         return 0.0
+    
+    # Angle with x-axis, normalized to be between 0 and pi/2
+    angles = np.abs(np.arctan2(deltas[:, 1], deltas[:, 0])) % (math.pi/2)
+    
+    # Find the most common angle, rounded to the nearest tolerance
+    keys, first_seen, counts = np.unique(np.round(angles / AXIS_ALIGNMENT_TOLERANCE).astype(np.int64),
+                                         return_index=True, return_counts=True)
+    # Break ties in favour of the angle that appears first along the exterior
+    candidates = np.flatnonzero(counts == counts.max())
+    principal_key = keys[candidates[np.argmin(first_seen[candidates])]]
+    return float(principal_key * AXIS_ALIGNMENT_TOLERANCE)
 
 def align_polygons(reference_polygon, extracted_polygon):
     """
@@ -146,57 +202,56 @@ def align_polygons(reference_polygon, extracted_polygon):
     # Rotate extracted polygon around its centroid
     rotated_polygon = rotate_polygon(extracted_polygon, rotation_angle)
     
-    # Translate to align centroids
-    dx = ref_centroid.x - rotated_polygon.centroid.x
-    dy = ref_centroid.y - rotated_polygon.centroid.y
+    # Translate to align centroids; rotating about the centroid leaves it in place
+    dx = ref_centroid.x - ext_centroid.x
+    dy = ref_centroid.y - ext_centroid.y
+    if abs(dx) < ALIGNMENT_EPSILON and abs(dy) < ALIGNMENT_EPSILON:
+        return rotated_polygon
     aligned_polygon = translate_polygon(rotated_polygon, dx, dy)
     
     return aligned_polygon
 
 def rotate_polygon(polygon, angle):
     """Rotate a polygon around its centroid by the given angle (in radians)."""
-    if angle == 0:
+    if abs(angle) < ALIGNMENT_EPSILON:
         return polygon
-        
-    centroid = polygon.centroid
-    rotated_coords = []
-    
-    for x, y in polygon.exterior.coords:
-        # Translate to origin (centroid)
-        tx = x - centroid.x
-        ty = y - centroid.y
-        
-        # Rotate
-        rx = tx * math.cos(angle) - ty * math.sin(angle)
-        ry = tx * math.sin(angle) + ty * math.cos(angle)
-        
-        # Translate back
-        rotated_coords.append((rx + centroid.x, ry + centroid.y))
-    
-    return Polygon(rotated_coords)
+    return affinity.rotate(polygon, angle, origin='centroid', use_radians=True)
 
 def translate_polygon(polygon, dx, dy):
     """Translate a polygon by the given offsets."""
-    translated_coords = [(x + dx, y + dy) for x, y in polygon.exterior.coords]
-    return Polygon(translated_coords)
+    return affinity.translate(polygon, xoff=dx, yoff=dy)
 
 def calculate_iou(poly1, poly2):
     """Calculate Intersection over Union score."""
     if poly1.is_empty or poly2.is_empty:
         return 0.0
+    # Disjoint bounding boxes mean no overlap; skip the GEOS overlay entirely
+    min_x1, min_y1, max_x1, max_y1 = poly1.bounds
+    min_x2, min_y2, max_x2, max_y2 = poly2.bounds
+    if max_x1 < min_x2 or max_x2 < min_x1 or max_y1 < min_y2 or max_y2 < min_y1:
+        return 0.0
     intersection = poly1.intersection(poly2).area
     union = poly1.union(poly2).area
     return intersection / union if union > 0 else 0.0
 
-def compare_floorplans(reference_dxf, generated_dxf):
-    """Compare two floor plans and return metrics."""
+def _load_polygon(dxf_or_polygon):
+    """Return the argument if it is already a Polygon, otherwise load it from DXF."""
+    return dxf_or_polygon if isinstance(dxf_or_polygon, Polygon) else load_dxf_polygon(dxf_or_polygon)
+
+def compare_floorplans(reference_dxf, generated_dxf, aligned_polygon=None):
+    """
+    Compare two floor plans and return metrics.
+    
+    aligned_polygon is the generated polygon already passed through
+    align_polygons; it is computed here when not given.
+    """
     # Load polygons from DXF files
-    ref_poly = reference_dxf if isinstance(reference_dxf, Polygon) else load_dxf_polygon(reference_dxf)
-    gen_poly = generated_dxf if isinstance(generated_dxf, Polygon) else load_dxf_polygon(generated_dxf)
+    ref_poly = _load_polygon(reference_dxf)
     
     # Align the extracted polygon with the reference polygon
-    aligned_gen_poly = align_polygons(ref_poly, gen_poly)
-    gen_poly = aligned_gen_poly
+    if aligned_polygon is None:
+        aligned_polygon = align_polygons(ref_poly, _load_polygon(generated_dxf))
+    gen_poly = aligned_polygon
     
     # Calculate metrics
     area_ref = ref_poly.area
@@ -217,55 +272,56 @@ def compare_floorplans(reference_dxf, generated_dxf):
                             perimeter_extracted=perimeter_extracted, perimeter_difference=perimeter_difference, 
                             perimeter_difference_percent=perimeter_difference_percent, similarity_score=similarity_score)
 
-def compare_floorplans_detailed(reference_dxf, generated_dxf):
-    """Compare two DXF floorplans and return detailed metrics."""
-    ref_poly = load_dxf_polygon(reference_dxf)
-    gen_poly = load_dxf_polygon(generated_dxf)
+def _wall_lengths(coords):
+    """Length of every segment of a coordinate sequence."""
+    segments = np.diff(coords, axis=0)
+    return np.hypot(segments[:, 0], segments[:, 1])
+
+def _turning_angles(coords):
+    """Signed angle (in degrees) between consecutive segments of a coordinate sequence."""
+    segments = np.diff(coords, axis=0)
+    v1, v2 = segments[:-1], segments[1:]
+    cross = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+    dot = (v1 * v2).sum(axis=1)
+    return np.degrees(np.arctan2(cross, dot))
+
+def compare_floorplans_detailed(reference_dxf, generated_dxf, aligned_polygon=None):
+    """
+    Compare two DXF floorplans and return detailed metrics.
     
-    # Align the extracted polygon with the reference polygon
-    aligned_gen_poly = align_polygons(ref_poly, gen_poly)
-    gen_poly = aligned_gen_poly
+    Either argument may also be an already loaded Polygon; aligned_polygon is
+    handled as in compare_floorplans.
+    """
+    ref_poly = _load_polygon(reference_dxf)
+    gen_poly = aligned_polygon if aligned_polygon is not None else _load_polygon(generated_dxf)
     
     if not ref_poly or not gen_poly:
         raise ValueError("Could not load one or both DXF files")
     
+    # Align the extracted polygon with the reference polygon
+    if aligned_polygon is None:
+        gen_poly = align_polygons(ref_poly, gen_poly)
+    
     # Calculate basic metrics
     area_difference = abs(ref_poly.area - gen_poly.area)
     perimeter_difference = abs(ref_poly.length - gen_poly.length)
     iou = calculate_iou(ref_poly, gen_poly)
     
     # Compare wall lengths
-    ref_coords = list(ref_poly.exterior.coords)
-    gen_coords = list(gen_poly.exterior.coords)
+    ref_coords = _coords(ref_poly)
+    gen_coords = _coords(gen_poly)
     
-    wall_length_differences = []
-    for i in range(len(ref_coords) - 1):
-        ref_wall = LineString([ref_coords[i], ref_coords[i+1]])
-        ref_len = ref_wall.length
-        
-        # Find closest matching wall
-        min_diff = float('inf')
-        for j in range(len(gen_coords) - 1):
-            gen_wall = LineString([gen_coords[j], gen_coords[j+1]])
-            diff = abs(ref_len - gen_wall.length)
-            min_diff = min(min_diff, diff)
-        wall_length_differences.append((ref_len, gen_wall.length))
+    ref_lengths = _wall_lengths(ref_coords)
+    gen_lengths = _wall_lengths(gen_coords)
     
-    # Compare angles
-    ref_angles = []
-    gen_angles = []
-    angle_differences = []
+    # Pair every reference wall with the closest matching generated wall
+    closest = np.abs(ref_lengths[:, None] - gen_lengths[None, :]).argmin(axis=1)
+    wall_length_differences = list(zip(ref_lengths.tolist(), gen_lengths[closest].tolist()))
     
-    for coords, angles in [(ref_coords, ref_angles), (gen_coords, gen_angles)]:
-        for i in range(len(coords) - 2):
-            v1 = np.array(coords[i+1]) - np.array(coords[i])
-            v2 = np.array(coords[i+2]) - np.array(coords[i+1])
-            angle = np.degrees(np.arctan2(np.cross(v1, v2), np.dot(v1, v2)))
-            angles.append(angle)
-    
-    for ref_angle in ref_angles:
-        min_diff = min(abs(ref_angle - gen_angle) for gen_angle in gen_angles)
-        angle_differences.append(min_diff)
+    # Compare angles
+    ref_angles = _turning_angles(ref_coords)
+    gen_angles = _turning_angles(gen_coords)
+    angle_differences = np.abs(ref_angles[:, None] - gen_angles[None, :]).min(axis=1).tolist()
     
     return ComparisonResult(
         area_difference=area_difference,
@@ -275,15 +331,22 @@ def compare_floorplans_detailed(reference_dxf, generated_dxf):
         iou_score=iou
     )
 
-def prepare_comparison_data(reference_polygon, extracted_polygon, metrics):
-    """Prepare data for comparison visualization without creating plots."""
-    # Extract polygon coordinates
-    ref_x, ref_y = reference_polygon.exterior.xy
+def prepare_comparison_data(reference_polygon, extracted_polygon, metrics, aligned_polygon=None):
+    """
+    Prepare data for comparison visualization without creating plots.
     
+    aligned_polygon is handled as in compare_floorplans.
+    """
     # Align the extracted polygon with the reference polygon
-    aligned_extracted_polygon = align_polygons(reference_polygon, extracted_polygon)
-    extracted_polygon = aligned_extracted_polygon
-    ext_x, ext_y = extracted_polygon.exterior.xy
+    if aligned_polygon is None:
+        aligned_polygon = align_polygons(reference_polygon, extracted_polygon)
+    extracted_polygon = aligned_polygon
+
+    # Extract polygon coordinates as column views of the cached exterior arrays
+    ref_coords = _coords(reference_polygon)
+    ext_coords = _coords(extracted_polygon)
+    ref_x, ref_y = ref_coords[:, 0], ref_coords[:, 1]
+    ext_x, ext_y = ext_coords[:, 0], ext_coords[:, 1]
 
     # Calculate centroids for alignment
     ref_centroid = (np.mean(ref_x), np.mean(ref_y))
@@ -296,33 +359,21 @@ def prepare_comparison_data(reference_polygon, extracted_polygon, metrics):
     # Prepare wall length comparison data - properly extract wall lengths from polygons
     wall_length_differences = []
     
-    # Get coordinates of polygon exteriors
-    ref_coords = list(reference_polygon.exterior.coords)
-    ext_coords = list(extracted_polygon.exterior.coords)
-    
-    # Calculate wall lengths for reference polygon
-    ref_wall_lengths = []
-    for i in range(len(ref_coords) - 1):
-        p1, p2 = ref_coords[i], ref_coords[i+1]
-        length = LineString([p1, p2]).length
-        ref_wall_lengths.append(length)
-    
-    # Calculate wall lengths for extracted polygon
-    ext_wall_lengths = []
-    for i in range(len(ext_coords) - 1):
-        p1, p2 = ext_coords[i], ext_coords[i+1]
-        length = LineString([p1, p2]).length
-        ext_wall_lengths.append(length)
+    # Calculate wall lengths for both polygons
+    ref_wall_lengths = _wall_lengths(ref_coords)
+    ext_wall_lengths = _wall_lengths(ext_coords)
     
     # Create pairs of wall lengths (use min length to avoid index errors)
     min_walls = min(len(ref_wall_lengths), len(ext_wall_lengths))
-    wall_length_differences = [(ref_wall_lengths[i], ext_wall_lengths[i]) for i in range(min_walls)]
+    wall_length_differences = list(zip(ref_wall_lengths[:min_walls].tolist(), ext_wall_lengths[:min_walls].tolist()))
     
     return (ref_x, ref_y, ext_x, ext_y, metrics_labels, metrics_values, wall_length_differences)
 
 def generate_comparison_report_in_main_thread(plot_data, output_pdf, include_wall_details=True):
     """Generate a visual comparison report with the provided metrics."""
-    fig, ax1 = matplotlib.pyplot.subplots(figsize=(12, 6))
+    fig = Figure(figsize=(12, 6))
+    canvas = FigureCanvasPdf(fig)
+    ax1 = fig.add_subplot(111)
     
     # Plot 1: Both polygons overlaid
     ref_x, ref_y = plot_data[0], plot_data[1]
@@ -348,5 +399,4 @@ def generate_comparison_report_in_main_thread(plot_data, output_pdf, include_wal
 
     # Save the figure to the output PDF
     fig.tight_layout()
-    matplotlib.pyplot.savefig(output_pdf)
-    matplotlib.pyplot.close(fig)
+    canvas.print_figure(output_pdf)
@@ -6,7 +6,9 @@ import logging
 import ezdxf
 from ezdxf.enums import TextEntityAlignment
 from shapely.geometry import MultiPoint, Polygon, LineString, Point
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+from matplotlib.patches import Patch
 from shapely.geometry import MultiPoint, Polygon
 
 # Configuration
@@ -18,6 +20,8 @@ random.seed(RANDOM_SEED)
 DBSCAN_EPS = 0.8
 DBSCAN_MIN_POINTS = 30
 NORMAL_TOLERANCE = 0.2
+DIMENSION_OFFSET = 0.2  # Distance of dimension lines and labels from their wall
+PDF_DENSITY_BINS = 400  # Resolution of the wall point density image in PDF exports
 
 # Set up logging
 logging.basicConfig(
@@ -43,7 +47,8 @@ def load_and_preprocess_pcd(pcd_file):
 def save_processed_pcd(pcd, output_file):
     """Save a processed point cloud for later reuse"""
     logger.info(f"Saving processed point cloud to: {output_file}")
-    open3d.io.write_point_cloud(output_file, pcd)
+    # Compressed binary PCD is far smaller and faster to read back than ASCII
+    open3d.io.write_point_cloud(output_file, pcd, write_ascii=False, compressed=True)
     logger.info(f"Saved processed point cloud successfully")
     return output_file
 
@@ -63,13 +68,15 @@ def segment_walls(pcd):
     vertical_wall_points = []
     walls_indices = []
     wall_models = []
-    remaining_cloud = pcd
+    # Plane search runs on the tensor point cloud, whose RANSAC is considerably
+    # faster than the legacy one; clustering stays on the legacy API
+    remaining_cloud = open3d.t.geometry.PointCloud.from_legacy(pcd, open3d.core.float64)
     
     for _ in range(5):
-        if len(remaining_cloud.points) == 0:
+        if remaining_cloud.is_empty():
             break
         
-        best_inliers = []
+        best_inliers = numpy.empty(0, dtype=numpy.int64)
         best_model = None
         for threshold in RANSAC_DISTANCE_CANDIDATES:
             plane_model, inliers = remaining_cloud.segment_plane(
@@ -77,20 +84,23 @@ def segment_walls(pcd):
                 ransac_n=3, 
                 num_iterations=1000
             )
-            if len(inliers) > len(best_inliers):
-                best_inliers = inliers
-                best_model = plane_model
+            if inliers.shape[0] > len(best_inliers):
+                best_inliers = inliers.numpy()
+                best_model = plane_model.numpy().tolist()
         
-        if not best_inliers:
+        if len(best_inliers) == 0:
             break
+        best_inliers_tensor = open3d.core.Tensor(best_inliers)
             
         [a, b, c, d] = best_model
         if abs(c) < NORMAL_TOLERANCE:
-            wall_cloud = remaining_cloud.select_by_index(best_inliers)
+            wall_cloud = remaining_cloud.select_by_index(best_inliers_tensor).to_legacy()
             labels = numpy.array(wall_cloud.cluster_dbscan(eps=DBSCAN_EPS, min_points=DBSCAN_MIN_POINTS))
             
-            if labels.max() >= 0:
-                majority_label = numpy.argmax(numpy.bincount(labels[labels >= 0]))
+            clustered_labels = labels[labels >= 0]
+            if len(clustered_labels) > 0:
+                cluster_ids, cluster_sizes = numpy.unique(clustered_labels, return_counts=True)
+                majority_label = cluster_ids[numpy.argmax(cluster_sizes)]
                 main_cluster_indices = numpy.where(labels == majority_label)[0]
                 main_cluster = wall_cloud.select_by_index(main_cluster_indices)
                 
@@ -101,7 +111,7 @@ def segment_walls(pcd):
                         walls_indices.append(main_cluster_indices.tolist())
                         wall_models.append(best_model)
         
-        remaining_cloud = remaining_cloud.select_by_index(best_inliers, invert=True)
+        remaining_cloud = remaining_cloud.select_by_index(best_inliers_tensor, invert=True)
     
     if not vertical_wall_points:
         logger.error("No vertical walls found in the point cloud")
@@ -121,6 +131,26 @@ def create_floor_plan(points_xy):
     logger.info(f"Floor plan created. Area: {polygon.area:.2f} m², Perimeter: {polygon.length:.2f} m")
     return polygon
 
+def _wall_dimension_layout(exterior_coords):
+    """
+    Lay out wall dimensions for a closed ring of (N, 2) coordinates.
+
+    Returns the length of every wall, the perpendicular offset of its
+    dimension line and the offset midpoint where its label goes.
+    """
+    starts, ends = exterior_coords[:-1], exterior_coords[1:]
+    deltas = ends - starts
+    lengths = numpy.hypot(deltas[:, 0], deltas[:, 1])
+    
+    # Perpendicular unit vector scaled to the offset; degenerate walls are offset along +y
+    offsets = numpy.tile([0.0, DIMENSION_OFFSET], (len(deltas), 1))
+    nonzero = lengths > 0
+    offsets[nonzero] = (numpy.column_stack([-deltas[nonzero, 1], deltas[nonzero, 0]])
+                        / lengths[nonzero, None] * DIMENSION_OFFSET)
+    
+    label_positions = (starts + ends) / 2 + offsets
+    return lengths, offsets, label_positions
+
 def export_floor_plan_to_dxf(polygon: Polygon, dxf_filename: str, add_dimensions=False):
     """Exports the floor plan polygon to DXF format"""
     doc = ezdxf.new(dxfversion="R2010")
@@ -129,33 +159,19 @@ def export_floor_plan_to_dxf(polygon: Polygon, dxf_filename: str, add_dimensions
     # Add a layer for dimensions
     doc.layers.add(name="DIMENSIONS", color=2)  # color 2 is yellow
     
-    exterior_coords = list(polygon.exterior.coords)
-    for i in range(len(exterior_coords) - 1):
-        x1, y1 = exterior_coords[i]
-        x2, y2 = exterior_coords[i+1]
-        msp.add_line((x1, y1), (x2, y2))
-        
-        # Add dimensions if requested
-        if add_dimensions:
-            # Calculate wall length
-            wall_length = numpy.sqrt((x2-x1)**2 + (y2-y1)**2)
-            
-            # Add dimension text
-            midpoint_x = (x1 + x2) / 2
-            midpoint_y = (y1 + y2) / 2
-            
-            # Calculate perpendicular offset for dimension line
-            dx, dy = x2-x1, y2-y1
-            length = numpy.sqrt(dx*dx + dy*dy)
-            if length > 0:
-                nx, ny = -dy/length * 0.2, dx/length * 0.2  # Perpendicular vector, 0.2 units away
-            else:
-                nx, ny = 0, 0.2
-            
+    # Emit the outline as a single closed polyline rather than one line per wall
+    exterior_coords = numpy.asarray(polygon.exterior.coords)[:, :2]
+    msp.add_lwpolyline(exterior_coords[:-1].tolist(), close=True)
+    
+    # Add dimensions if requested
+    if add_dimensions:
+        wall_lengths, offsets, label_positions = _wall_dimension_layout(exterior_coords)
+        for start, end, wall_length, offset, label_position in zip(
+                exterior_coords[:-1], exterior_coords[1:], wall_lengths, offsets, label_positions):
             # Add dimension line
-            dim_line = msp.add_line(
-                (x1 + nx, y1 + ny),
-                (x2 + nx, y2 + ny),
+            msp.add_line(
+                tuple(start + offset),
+                tuple(end + offset),
                 dxfattribs={"layer": "DIMENSIONS"}
             )
             
@@ -167,7 +183,7 @@ def export_floor_plan_to_dxf(polygon: Polygon, dxf_filename: str, add_dimensions
             )
             # Set position using the correct method for current ezdxf version
             # Use the proper enum value instead of a string
-            text.set_placement((midpoint_x + nx, midpoint_y + ny), align=TextEntityAlignment.MIDDLE_CENTER)
+            text.set_placement(tuple(label_position), align=TextEntityAlignment.MIDDLE_CENTER)
     
     # Add area calculation
     area = polygon.area
@@ -181,48 +197,37 @@ def export_floor_plan_to_dxf(polygon: Polygon, dxf_filename: str, add_dimensions
 
 def plot_and_save_floor_plan_pdf(points_xy, polygon, pdf_filename):
     """Creates and saves a PDF visualization of the floor plan"""
-    plt.figure(figsize=(8, 8))
+    # Draw on a standalone figure; pyplot's global state is not needed for a file export
+    fig = Figure(figsize=(8, 8))
+    canvas = FigureCanvasPdf(fig)
+    ax = fig.add_subplot(111)
     
-    # Plot wall points with lower opacity
-    plt.scatter(points_xy[:, 0], points_xy[:, 1], s=1, c='gray', alpha=0.3, label='Wall Points')
+    # Plot wall point density as one raster image; drawing every point as a
+    # vector marker makes the PDF huge and slow to render for dense clouds
+    density, x_edges, y_edges = numpy.histogram2d(points_xy[:, 0], points_xy[:, 1], bins=PDF_DENSITY_BINS)
+    ax.imshow(numpy.ma.masked_equal(density.T, 0), origin='lower', cmap='Greys',
+              extent=[x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]], aspect='equal')
+    wall_points_handle = Patch(color='gray', alpha=0.3, label='Wall Points')
     
     # Plot floor plan outline
     outline_x, outline_y = polygon.exterior.xy
-    plt.plot(outline_x, outline_y, 'r-', linewidth=2, label='Floor Plan')
+    ax.plot(outline_x, outline_y, 'r-', linewidth=2, label='Floor Plan')
     
     # Add dimensions for each wall
-    exterior_coords = list(polygon.exterior.coords)
-    for i in range(len(exterior_coords) - 1):
-        x1, y1 = exterior_coords[i]
-        x2, y2 = exterior_coords[i+1]
-        
-        # Calculate wall length
-        wall_length = numpy.sqrt((x2-x1)**2 + (y2-y1)**2)
-        
-        # Calculate midpoint for text placement
-        midpoint_x = (x1 + x2) / 2
-        midpoint_y = (y1 + y2) / 2
-        
-        # Calculate perpendicular offset for dimension text
-        dx, dy = x2-x1, y2-y1
-        length = numpy.sqrt(dx*dx + dy*dy)
-        if length > 0:
-            nx, ny = -dy/length * 0.2, dx/length * 0.2  # Perpendicular vector, 0.2 units away
-        else:
-            nx, ny = 0, 0.2
-            
-        # Add dimension text
-        plt.text(midpoint_x + nx, midpoint_y + ny, f"{wall_length:.2f}m", 
-                 ha='center', va='center', backgroundcolor='white', fontsize=8)
+    exterior_coords = numpy.asarray(polygon.exterior.coords)[:, :2]
+    wall_lengths, _, label_positions = _wall_dimension_layout(exterior_coords)
+    for wall_length, (label_x, label_y) in zip(wall_lengths, label_positions):
+        ax.text(label_x, label_y, f"{wall_length:.2f}m", 
+                ha='center', va='center', backgroundcolor='white', fontsize=8)
     
     # Add area calculation
     area = polygon.area
     centroid = polygon.centroid
-    plt.text(centroid.x, centroid.y, f"Area: {area:.2f} m²", 
-             ha='center', va='center', fontsize=10, fontweight='bold',
-             bbox=dict(facecolor='white', alpha=0.8, boxstyle='round,pad=0.5'))
+    ax.text(centroid.x, centroid.y, f"Area: {area:.2f} m²", 
+            ha='center', va='center', fontsize=10, fontweight='bold',
+            bbox=dict(facecolor='white', alpha=0.8, boxstyle='round,pad=0.5'))
     
-    plt.axis('equal')
-    plt.legend(loc='upper right')
-    plt.savefig(pdf_filename)
-    plt.close()
+    ax.axis('equal')
+    handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=[wall_points_handle] + handles, loc='upper right')
+    canvas.print_figure(pdf_filename)
@@ -1,125 +1,267 @@
 import sys, os
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QDir
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot, QDir
 from PyQt5.QtGui import QIcon, QFont
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 import matplotlib
-from combine_pcd_frames import combine_pcd_files, save_combined_pcd 
+from combine_pcd_frames import combine_pcd_files, save_combined_pcd
 import numpy as np
+from shapely import affinity
+from shapely.geometry import Polygon
 from floor_plan_extractor import load_and_preprocess_pcd, segment_walls, create_floor_plan, export_floor_plan_to_dxf, plot_and_save_floor_plan_pdf, save_processed_pcd, load_processed_pcd
-from dxf_comparison import load_dxf_polygon, compare_floorplans, prepare_comparison_data, generate_comparison_report_in_main_thread, ComparisonMetrics
-
-class ProcessingThread(QThread):
+from dxf_comparison import load_dxf_polygon, align_polygons, compare_floorplans, prepare_comparison_data, generate_comparison_report_in_main_thread, ComparisonMetrics
+
+# Minimum interval between status label updates from worker progress signals
+PROGRESS_INTERVAL_MS = 50
+
+# Comparison summary shown in the results panel, filled from ComparisonMetrics fields
+_HTML_TEMPLATE = """
+<h3>Floor Plan Comparison Results</h3>
+<p><b>Overall Similarity Score:</b> {similarity_score:.1f}%</p>
+
+<h4>Unit Information:</h4>
+<p>Reference DXF units were converted to match extracted floor plan (meters).</p>
+<p>If the comparison looks incorrect, try selecting a different unit when uploading.</p>
+
+<h4>Area Comparison:</h4>
+<ul>
+    <li>Reference: {area_reference:.2f} m²</li>
+    <li>Extracted: {area_extracted:.2f} m²</li>
+    <li>Difference: {area_difference:.2f} m² ({area_difference_percent:.1f}%)</li>
+</ul>
+
+<h4>Perimeter Comparison:</h4>
+<ul>
+    <li>Reference: {perimeter_reference:.2f} m</li>
+    <li>Extracted: {perimeter_extracted:.2f} m</li>
+    <li>Difference: {perimeter_difference:.2f} m ({perimeter_difference_percent:.1f}%)</li>
+</ul>
+"""
+
+# The preview is a few hundred pixels wide; more points than this add no detail
+PREVIEW_MAX_POINTS = 200_000
+
+# Parsed DXF polygons by path, with the (mtime, size) they were parsed at
+_DXF_CACHE = {}
+
+def _load_dxf_polygon_cached(dxf_path):
+    """Load a DXF polygon, reusing the previous parse while the file is unchanged"""
+    stat = os.stat(dxf_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _DXF_CACHE.get(dxf_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    polygon = load_dxf_polygon(dxf_path)
+    _DXF_CACHE[dxf_path] = (signature, polygon)
+    return polygon
+
+# Scaled reference polygons by (id(polygon), scale), holding the source polygon
+# so a recycled id is never mistaken for a hit
+SCALED_POLYGON_CACHE_SIZE = 4
+_SCALED_POLYGON_CACHE = {}
+_scaled_polygon_cache_lock = threading.Lock()
+
+def _scaled_polygon_cached(polygon, scale):
+    """Scale a polygon about the origin, reusing the result for the same polygon and scale"""
+    key = (id(polygon), scale)
+    with _scaled_polygon_cache_lock:
+        cached = _SCALED_POLYGON_CACHE.get(key)
+        if cached is not None and cached[0] is polygon:
+            return cached[1]
+    scaled = affinity.scale(polygon, xfact=scale, yfact=scale, origin=(0, 0))
+    with _scaled_polygon_cache_lock:
+        _SCALED_POLYGON_CACHE[key] = (polygon, scaled)
+        # Evict the oldest entries; dicts keep insertion order
+        while len(_SCALED_POLYGON_CACHE) > SCALED_POLYGON_CACHE_SIZE:
+            del _SCALED_POLYGON_CACHE[next(iter(_SCALED_POLYGON_CACHE))]
+    return scaled
+
+# Theme icons by name; each fromTheme lookup searches the icon theme directories
+_ICON_CACHE = {}
+
+def _icon(name):
+    """Return the theme icon for name, looking it up only once"""
+    icon = _ICON_CACHE.get(name)
+    if icon is None:
+        icon = QIcon.fromTheme(name)
+        _ICON_CACHE[name] = icon
+    return icon
+
+class WorkerSignals(QObject):
+    """Signals a pooled worker uses to report back to the GUI thread"""
     finished = pyqtSignal(object)
     progress = pyqtSignal(str)
     error = pyqtSignal(str)
 
+class ProcessingWorker(QRunnable):
     def __init__(self, point_cloud_path, params):
         super().__init__()
+        self.signals = WorkerSignals()
         self.point_cloud_path = point_cloud_path
         self.params = params
 
+    @pyqtSlot()
     def run(self):
         try:
-            self.progress.emit("Loading point cloud...")
+            self.signals.progress.emit("Loading point cloud...")
             point_cloud = load_and_preprocess_pcd(self.point_cloud_path)
             
-            self.progress.emit("Segmenting walls...")
+            self.signals.progress.emit("Segmenting walls...")
             points_xy, walls_indices, wall_models = segment_walls(point_cloud)
             
-            self.progress.emit("Creating floor plan...")
+            self.signals.progress.emit("Creating floor plan...")
             polygon = create_floor_plan(points_xy)
             
-            self.finished.emit((points_xy, polygon))
+            self.signals.finished.emit((points_xy, polygon))
         except Exception as e:
-            self.error.emit(str(e))
-
-class PcdMergeThread(QThread):
-    finished = pyqtSignal(str)
-    progress = pyqtSignal(str)
-    error = pyqtSignal(str)
+            self.signals.error.emit(str(e))
 
+class PcdMergeWorker(QRunnable):
     def __init__(self, pcd_files, output_path, voxel_size=None):
         super().__init__()
+        self.signals = WorkerSignals()
         self.pcd_files = pcd_files
         self.output_path = output_path
         self.voxel_size = voxel_size
 
+    @pyqtSlot()
     def run(self):
         try:
-            self.progress.emit(f"Merging {len(self.pcd_files)} PCD files...")
+            self.signals.progress.emit(f"Merging {len(self.pcd_files)} PCD files...")
+            # With a voxel size the frames are downsampled as they are read, so the
+            # full union is never held in memory
             combined_pcd = combine_pcd_files(self.pcd_files, self.voxel_size)
             save_combined_pcd(combined_pcd, self.output_path)
-            self.finished.emit(self.output_path)
+            self.signals.finished.emit(self.output_path)
         except Exception as e:
-            self.error.emit(str(e))
+            self.signals.error.emit(str(e))
 
-class ComparisonThread(QThread):
-    finished = pyqtSignal(object)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, reference_dxf_path, extracted_dxf_path, scale_factor=1.0):
+class ComparisonWorker(QRunnable):
+    def __init__(self, reference_dxf_path, extracted, scale_factor=1.0):
         super().__init__()
+        self.signals = WorkerSignals()
         self.reference_dxf_path = reference_dxf_path
-        self.extracted_dxf_path = extracted_dxf_path
+        # Either a path to a DXF file or an in-memory shapely Polygon
+        self.extracted = extracted
         self.scale_factor = scale_factor
 
+    @pyqtSlot()
     def run(self):
         try:
-            from shapely.geometry import Polygon
-            import logging
-            # Validate that both files exist
-            if not os.path.exists(self.reference_dxf_path):
-                raise FileNotFoundError(f"Reference DXF file not found: {self.reference_dxf_path}")
-            if not os.path.exists(self.extracted_dxf_path):
-                raise FileNotFoundError(f"Extracted DXF file not found: {self.extracted_dxf_path}")
+            extracted_is_polygon = isinstance(self.extracted, Polygon)
+            
+            # A missing file surfaces from the load as an "Error loading ..." below
+            if extracted_is_polygon:
+                # Only the reference needs parsing, so load it on this worker thread
+                load_reference = partial(_load_dxf_polygon_cached, self.reference_dxf_path)
+            else:
+                # The two DXF loads are independent, so parse them concurrently
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    reference_future = executor.submit(_load_dxf_polygon_cached, self.reference_dxf_path)
+                    extracted_future = executor.submit(_load_dxf_polygon_cached, self.extracted)
+                load_reference = reference_future.result
             
             try:
                 # Load reference polygon
-                reference_polygon = load_dxf_polygon(self.reference_dxf_path)
-                # Apply scale factor to reference polygon if needed
+                reference_polygon = load_reference()
+                # Apply scale factor to reference polygon if needed; the DXF cache returns
+                # the same polygon object for an unchanged file, so re-compares hit here too
                 if self.scale_factor != 1.0:
-                    reference_polygon = Polygon([(p[0] * self.scale_factor, p[1] * self.scale_factor) 
-                                               for p in reference_polygon.exterior.coords])
+                    reference_polygon = _scaled_polygon_cached(reference_polygon, self.scale_factor)
                 logging.info(f"Successfully loaded reference DXF: {self.reference_dxf_path}")
             except Exception as e:
                 raise RuntimeError(f"Error loading reference DXF: {str(e)}")
                 
-            try:
-                # Load extracted polygon
-                extracted_polygon = load_dxf_polygon(self.extracted_dxf_path)
-                logging.info(f"Successfully loaded extracted DXF: {self.extracted_dxf_path}")
-            except Exception as e:
-                raise RuntimeError(f"Error loading extracted DXF: {str(e)}")
+            if extracted_is_polygon:
+                # Already in memory, so there is nothing to parse
+                extracted_polygon = self.extracted
+            else:
+                try:
+                    # Load extracted polygon
+                    extracted_polygon = extracted_future.result()
+                    logging.info(f"Successfully loaded extracted DXF: {self.extracted}")
+                except Exception as e:
+                    raise RuntimeError(f"Error loading extracted DXF: {str(e)}")
+            
+            # Align once and share the result between the metrics and the plot data
+            aligned_polygon = align_polygons(reference_polygon, extracted_polygon)
             
             # Compare the floor plans
-            metrics = compare_floorplans(reference_polygon, extracted_polygon)
+            metrics = compare_floorplans(reference_polygon, extracted_polygon, aligned_polygon)
             
             # Instead of generating the report here, just prepare the data
-            from dxf_comparison import prepare_comparison_data
-            plot_data = prepare_comparison_data(reference_polygon, extracted_polygon, metrics)
+            plot_data = prepare_comparison_data(reference_polygon, extracted_polygon, metrics, aligned_polygon)
             
             # Define report path but don't generate it yet
             report_path = os.path.join(QDir.tempPath(), "floor_plan_comparison.pdf")
             
             # Send the data back to the main thread for plotting
-            self.finished.emit((reference_polygon, extracted_polygon, metrics, plot_data, report_path))
+            self.signals.finished.emit((reference_polygon, extracted_polygon, metrics, plot_data, report_path))
         except Exception as e:
-            import traceback
             error_msg = f"Process failed: {str(e)}\n{traceback.format_exc()}"
-            self.error_signal.emit(error_msg)
+            self.signals.error.emit(error_msg)
+
+class ReportExportWorker(QRunnable):
+    def __init__(self, plot_data, save_path):
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.plot_data = plot_data
+        self.save_path = save_path
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            # The report is drawn on its own Figure/FigureCanvasPdf, so it is safe off the GUI thread
+            generate_comparison_report_in_main_thread(self.plot_data, self.save_path)
+            self.signals.finished.emit(self.save_path)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+class FileExportWorker(QRunnable):
+    def __init__(self, polygon, points_xy, export_dir, export_dxf, export_pdf):
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.polygon = polygon
+        self.points_xy = points_xy
+        self.export_dir = export_dir
+        self.export_dxf = export_dxf
+        self.export_pdf = export_pdf
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            if self.export_dxf:
+                self.signals.progress.emit("Exporting DXF...")
+                export_floor_plan_to_dxf(self.polygon, os.path.join(self.export_dir, "floorplan.dxf"))
+            if self.export_pdf:
+                self.signals.progress.emit("Exporting PDF...")
+                plot_and_save_floor_plan_pdf(self.points_xy, self.polygon,
+                                             os.path.join(self.export_dir, "floorplan.pdf"))
+            self.signals.finished.emit(self.export_dir)
+        except Exception as e:
+            self.signals.error.emit(str(e))
 
 class FloorPlanApp(QWidget):
     def __init__(self):
         super().__init__()
         self.point_cloud_path = ""
         self.points_xy = None
+        self.preview_points = None
         self.polygon = None
+        self._polygon_coords = None
         self.scale_factor = 1.0  # Default scale factor
         self.reference_dxf_path = ""
-        self.processing_thread = None
+        self.processing_worker = None
+        # Worker progress is applied at most every PROGRESS_INTERVAL_MS
+        self._pending_progress = None
+        self._progress_timer_armed = False
         self.pcd_files = []
         self.merged_pcd_path = ""
         self.initUI()
@@ -134,12 +276,12 @@ class FloorPlanApp(QWidget):
         file_layout = QHBoxLayout()
 
         self.mergePcdBtn = QPushButton('Merge PCD Frames')
-        self.mergePcdBtn.setIcon(QIcon.fromTheme("edit-copy"))
+        self.mergePcdBtn.setIcon(_icon("edit-copy"))
         self.mergePcdBtn.clicked.connect(self.mergePcdFrames)
         file_layout.addWidget(self.mergePcdBtn)
         
         self.loadBtn = QPushButton('Load Point Cloud Data Scan')
-        self.loadBtn.setIcon(QIcon.fromTheme("document-open"))
+        self.loadBtn.setIcon(_icon("document-open"))
         self.loadBtn.clicked.connect(self.loadPointCloudData)
         # Initially disable until we have a merged PCD or user loads one directly
         self.loadBtn.setEnabled(True)
@@ -151,8 +293,10 @@ class FloorPlanApp(QWidget):
         self.layout.addWidget(file_group)
 
         # Preview area
-        self.figure = Figure(figsize=(8, 8))
+        # constrained_layout re-solves the spacing at draw time, so no tight_layout pass is needed
+        self.figure = Figure(figsize=(8, 8), constrained_layout=True)
         self.canvas = FigureCanvas(self.figure)
+        self.initPlots()
         self.layout.addWidget(self.canvas)
         
         # Comparison results text area
@@ -204,7 +348,7 @@ class FloorPlanApp(QWidget):
 
         # Exit button
         self.exitBtn = QPushButton('Exit Application')
-        self.exitBtn.setIcon(QIcon.fromTheme("application-exit"))
+        self.exitBtn.setIcon(_icon("application-exit"))
         self.exitBtn.clicked.connect(self.exitApplication)
         self.exitBtn.setStyleSheet("padding: 8px;")
         
@@ -213,6 +357,40 @@ class FloorPlanApp(QWidget):
 
         self.setLayout(self.layout)
 
+    def initPlots(self):
+        """Create the preview and comparison axes once; redraws only update their artists"""
+        grid = self.figure.add_gridspec(1, 2)
+        
+        # Single floor plan preview spanning the figure
+        self.ax = self.figure.add_subplot(grid[0, :])
+        # Rasterize the cloud so vector output gets one image instead of a path per point
+        self.scatter_artist = self.ax.scatter([], [], s=1, c='gray', label='Point Cloud', rasterized=True)
+        self.outline_artist, = self.ax.plot([], [], 'r-', linewidth=2, label='Floor Plan Outline')
+        self.ax.set_aspect('equal')
+        self.ax.legend()
+        
+        # Side-by-side comparison: overlaid polygons and a metrics summary
+        self.ax_cmp_left = self.figure.add_subplot(grid[0, 0])
+        self.reference_artist, = self.ax_cmp_left.plot([], [], 'b-', linewidth=2, label='Reference')
+        self.extracted_artist, = self.ax_cmp_left.plot([], [], 'r--', linewidth=2, label='Extracted')
+        self.ax_cmp_left.set_aspect('equal')
+        self.ax_cmp_left.legend()
+        
+        self.ax_cmp_right = self.figure.add_subplot(grid[0, 1])
+        self.ax_cmp_right.set_title('Comparison Metrics')
+        self.ax_cmp_right.set_ylim(0, 100)
+        # Bars are created on the first comparison, when the metric labels are known
+        self.metrics_bars = None
+        
+        self.showAxes()
+
+    def showAxes(self, *visible_axes):
+        """Show only the given axes, keeping hidden ones out of the layout"""
+        for ax in (self.ax, self.ax_cmp_left, self.ax_cmp_right):
+            shown = ax in visible_axes
+            ax.set_visible(shown)
+            ax.set_in_layout(shown)
+
     def mergePcdFrames(self):
         # If we already have PCD files from conversion, use those
         if not self.pcd_files:
@@ -238,16 +416,18 @@ class FloorPlanApp(QWidget):
                 self.statusLabel.setText(f"Merging {len(self.pcd_files)} PCD files...")
                 self.progressBar.setVisible(True)
                 
-                # Start merge in a separate thread
-                self.pcd_merge_thread = PcdMergeThread(self.pcd_files, output_file, voxel_size=0.01)
-                self.pcd_merge_thread.progress.connect(self.updateProgress)
-                self.pcd_merge_thread.finished.connect(self.onPcdMergeComplete)
-                self.pcd_merge_thread.error.connect(self.onProcessingError)
-                self.pcd_merge_thread.start()
+                # Start merge on a pooled worker thread
+                self.pcd_merge_worker = PcdMergeWorker(self.pcd_files, output_file, voxel_size=0.01)
+                self.pcd_merge_worker.signals.progress.connect(self.updateProgress)
+                self.pcd_merge_worker.signals.finished.connect(self.onPcdMergeComplete)
+                self.pcd_merge_worker.signals.error.connect(self.onProcessingError)
+                QThreadPool.globalInstance().start(self.pcd_merge_worker)
 
     def onPcdMergeComplete(self, output_path):
         self.merged_pcd_path = output_path
         self.progressBar.setVisible(False)
+        # Drop any queued progress so it cannot overwrite the final status
+        self._pending_progress = None
         self.statusLabel.setText(f"Merge complete. Saved to: {os.path.basename(output_path)}")
         
         # Enable the load button
@@ -275,21 +455,42 @@ class FloorPlanApp(QWidget):
             self.startProcessing()
 
     def startProcessing(self):
-        self.processing_thread = ProcessingThread(self.point_cloud_path, {})
-        self.processing_thread.progress.connect(self.updateProgress)
-        self.processing_thread.finished.connect(self.onProcessingComplete)
-        self.processing_thread.error.connect(self.onProcessingError)
-        self.processing_thread.start()
+        self.processing_worker = ProcessingWorker(self.point_cloud_path, {})
+        self.processing_worker.signals.progress.connect(self.updateProgress)
+        self.processing_worker.signals.finished.connect(self.onProcessingComplete)
+        self.processing_worker.signals.error.connect(self.onProcessingError)
+        QThreadPool.globalInstance().start(self.processing_worker)
         
     def updateProgress(self, message):
-        self.statusLabel.setText(message)
+        # Keep only the latest message and apply it on a timer so chatty
+        # workers cannot flood the event loop with label updates
+        self._pending_progress = message
+        if not self._progress_timer_armed:
+            self._progress_timer_armed = True
+            QTimer.singleShot(PROGRESS_INTERVAL_MS, self._flush_progress)
+
+    def _flush_progress(self):
+        self._progress_timer_armed = False
+        if self._pending_progress is not None:
+            self.statusLabel.setText(self._pending_progress)
+            self._pending_progress = None
         
     def onProcessingComplete(self, result):
-        self.points_xy, self.polygon = result
+        points_xy, self.polygon = result
+        # Outline vertices are fixed until the next extraction, so copy them out of GEOS once
+        self._polygon_coords = np.asarray(self.polygon.exterior.coords)
+        # float32 is far finer than a preview pixel and halves the memory the cloud holds
+        self.points_xy = np.ascontiguousarray(points_xy, dtype=np.float32)
+        # Subsample once with a fixed stride so every redraw reuses the same points.
+        # set_offsets stacks the x/y columns into float64 offsets, so store the preview
+        # as a contiguous float64 (N, 2) buffer; its columns then pass through uncopied
+        stride = max(1, -(-len(self.points_xy) // PREVIEW_MAX_POINTS))  # ceil division
+        self.preview_points = np.ascontiguousarray(self.points_xy[::stride], dtype=np.float64)
         self.updatePreview()
         self.exportBtn.setEnabled(True)
         self.compareBtn.setEnabled(True)
         self.progressBar.setVisible(False)
+        self._pending_progress = None
         self.statusLabel.setText("Processing complete!")
         
     def onProcessingError(self, error_message):
@@ -297,18 +498,19 @@ class FloorPlanApp(QWidget):
         self.progressBar.setVisible(False)
         
     def updatePreview(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.scatter(self.points_xy[:, 0], self.points_xy[:, 1], s=1, c='gray', label='Point Cloud')
-        outline_x, outline_y = self.polygon.exterior.xy
-        ax.plot(outline_x, outline_y, 'r-', linewidth=2, label='Floor Plan Outline')
+        self.scatter_artist.set_offsets(self.preview_points)
+        self.outline_artist.set_data(self._polygon_coords[:, 0], self._polygon_coords[:, 1])
 
         # Calculate area in square meters
         area = self.polygon.area * self.scale_factor ** 2
-        ax.set_title(f"Floor Plan (Area: {area:.2f} m²)")
-        ax.set_aspect('equal')
-        ax.legend()
-        self.canvas.draw()
+        self.ax.set_title(f"Floor Plan (Area: {area:.2f} m²)")
+        
+        # relim() only looks at lines, so add the scatter extent explicitly
+        self.ax.relim()
+        self.ax.update_datalim(self.preview_points)
+        self.ax.autoscale_view()
+        self.showAxes(self.ax)
+        self.canvas.draw_idle()
 
     def compareWithReference(self):
         """Compare the extracted floor plan with a reference DXF file"""
@@ -338,21 +540,17 @@ class FloorPlanApp(QWidget):
         scale_factor = 1.0
         
         try:
-            # First export the current floor plan to a temporary DXF file
-            temp_dxf = os.path.join(QDir.tempPath(), "temp_floorplan.dxf")
-            export_floor_plan_to_dxf(self.polygon, temp_dxf)
-            
             # Show progress
             self.statusLabel.setText("Comparing floor plans...")
             self.progressBar.setVisible(True)
             
-            # Run comparison in a separate thread
-            self.comparison_thread = ComparisonThread(self.reference_dxf_path, temp_dxf, scale_factor)
-            self.comparison_thread.finished.connect(self.onComparisonComplete)
-            self.comparison_thread.error_signal.connect(self.onProcessingError)
-            self.comparison_thread.start()
+            # Run comparison on a pooled worker thread; the extracted polygon is
+            # passed directly instead of round-tripping it through a DXF file
+            self.comparison_worker = ComparisonWorker(self.reference_dxf_path, self.polygon, scale_factor)
+            self.comparison_worker.signals.finished.connect(self.onComparisonComplete)
+            self.comparison_worker.signals.error.connect(self.onProcessingError)
+            QThreadPool.globalInstance().start(self.comparison_worker)
         except Exception as e:
-            import traceback
             error_msg = f"Error preparing comparison: {str(e)}\n{traceback.format_exc()}"
             QMessageBox.critical(self, "Error", error_msg)
             self.progressBar.setVisible(False)
@@ -364,61 +562,38 @@ class FloorPlanApp(QWidget):
         reference_polygon, extracted_polygon, metrics, plot_data, report_path = result
         self.progressBar.setVisible(False)
         self.plot_data = plot_data  # Store plot data as an instance attribute
+        self._pending_progress = None
         self.statusLabel.setText("Comparison complete!")
         self.comparison_report_path = report_path  # Store for export
         
         # Show comparison results
         self.comparisonResults.setVisible(True)
-        self.comparisonResults.setHtml(f"""
-            <h3>Floor Plan Comparison Results</h3>
-            <p><b>Overall Similarity Score:</b> {metrics.similarity_score:.1f}%</p>
-            
-            <h4>Unit Information:</h4>
-            <p>Reference DXF units were converted to match extracted floor plan (meters).</p>
-            <p>If the comparison looks incorrect, try selecting a different unit when uploading.</p>
-            
-            <h4>Area Comparison:</h4>
-            <ul>
-                <li>Reference: {metrics.area_reference:.2f} m²</li>
-                <li>Extracted: {metrics.area_extracted:.2f} m²</li>
-                <li>Difference: {metrics.area_difference:.2f} m² ({metrics.area_difference_percent:.1f}%)</li>
-            </ul>
-            
-            <h4>Perimeter Comparison:</h4>
-            <ul>
-                <li>Reference: {metrics.perimeter_reference:.2f} m</li>
-                <li>Extracted: {metrics.perimeter_extracted:.2f} m</li>
-                <li>Difference: {metrics.perimeter_difference:.2f} m ({metrics.perimeter_difference_percent:.1f}%)</li>
-            </ul>
-        """)
+        self.comparisonResults.setUpdatesEnabled(False)
+        self.comparisonResults.setHtml(_HTML_TEMPLATE.format_map(vars(metrics)))
+        self.comparisonResults.setUpdatesEnabled(True)
         
         try:
-            # Clear the current figure
-            self.figure.clear()
-
-            # Create a figure with two subplots in the main thread
-            ax1 = self.figure.add_subplot(121)  # 1 row, 2 cols, first plot
-            ax2 = self.figure.add_subplot(122)  # 1 row, 2 cols, second plot
-
             # Plot 1: Both polygons overlaid
             ref_x, ref_y = plot_data[0], plot_data[1]
             ext_x, ext_y = plot_data[2], plot_data[3]
 
-            ax1.plot(ref_x, ref_y, 'b-', linewidth=2, label='Reference')
-            ax1.plot(ext_x, ext_y, 'r--', linewidth=2, label='Extracted')
-            ax1.set_title(f"Floor Plan Comparison (Similarity: {metrics.similarity_score:.1f}%)")
-            ax1.set_aspect('equal')
-            ax1.legend()
+            self.reference_artist.set_data(ref_x, ref_y)
+            self.extracted_artist.set_data(ext_x, ext_y)
+            self.ax_cmp_left.set_title(f"Floor Plan Comparison (Similarity: {metrics.similarity_score:.1f}%)")
+            self.ax_cmp_left.relim()
+            self.ax_cmp_left.autoscale_view()
 
             # Plot 2: Metrics summary
             metrics_labels, metrics_values = plot_data[4], plot_data[5]
-            ax2.bar(metrics_labels, metrics_values)
-            ax2.set_title('Comparison Metrics')
-            ax2.set_ylim(0, 100)
-
-            # Update the canvas
-            self.figure.tight_layout()
-            self.canvas.draw()
+            if self.metrics_bars is None:
+                self.metrics_bars = self.ax_cmp_right.bar(metrics_labels, metrics_values)
+            else:
+                for bar, value in zip(self.metrics_bars, metrics_values):
+                    bar.set_height(value)
+
+            # Swap the comparison axes in and update the canvas
+            self.showAxes(self.ax_cmp_left, self.ax_cmp_right)
+            self.canvas.draw_idle()
             
             # Enable the export comparison button
             self.exportComparisonBtn.setEnabled(True)
@@ -437,8 +612,22 @@ class FloorPlanApp(QWidget):
             self, "Save Comparison Report", "", "PDF Files (*.pdf);;All Files (*)", options=options)
         
         if save_path:
-            generate_comparison_report_in_main_thread(self.plot_data, save_path)
-            QMessageBox.information(self, "Export Complete", f"Comparison report saved to: {save_path}")
+            # Render the PDF on a pooled worker thread to keep the window responsive
+            self.statusLabel.setText("Exporting comparison report...")
+            self.report_export_worker = ReportExportWorker(self.plot_data, save_path)
+            self.report_export_worker.signals.finished.connect(self.onReportExportComplete)
+            self.report_export_worker.signals.error.connect(self.onExportError)
+            QThreadPool.globalInstance().start(self.report_export_worker)
+
+    def onExportError(self, error_message):
+        # Drop any queued progress so the failure status is what stays visible
+        self._pending_progress = None
+        self.statusLabel.setText("Export failed")
+        QMessageBox.critical(self, "Error", f"Export failed: {error_message}")
+
+    def onReportExportComplete(self, save_path):
+        self.statusLabel.setText("Comparison report exported")
+        QMessageBox.information(self, "Export Complete", f"Comparison report saved to: {save_path}")
 
     def exportFiles(self):
         if not self.polygon:
@@ -453,18 +642,24 @@ class FloorPlanApp(QWidget):
             self, "Select Export Directory"
         )
         if export_dir:
-            if self.exportDWG.isChecked():
-                export_floor_plan_to_dxf(
-                    self.polygon,
-                    os.path.join(export_dir, "floorplan.dxf")
-                )
-            if self.exportPDF.isChecked():
-                plot_and_save_floor_plan_pdf(
-                    self.points_xy,
-                    self.polygon,
-                    os.path.join(export_dir, "floorplan.pdf")
-                )
-            QMessageBox.information(self, "Success", "Export complete!")
+            # Write the files on a pooled worker thread so ezdxf and the PDF
+            # rendering do not block the UI
+            self.file_export_worker = FileExportWorker(
+                self.polygon,
+                self.points_xy,
+                export_dir,
+                self.exportDWG.isChecked(),
+                self.exportPDF.isChecked()
+            )
+            self.file_export_worker.signals.progress.connect(self.updateProgress)
+            self.file_export_worker.signals.finished.connect(self.onFileExportComplete)
+            self.file_export_worker.signals.error.connect(self.onExportError)
+            QThreadPool.globalInstance().start(self.file_export_worker)
+
+    def onFileExportComplete(self, export_dir):
+        self._pending_progress = None
+        self.statusLabel.setText("Export complete")
+        QMessageBox.information(self, "Success", "Export complete!")
 
     def exitApplication(self):
         """Handles the exit button click with a confirmation dialog"""
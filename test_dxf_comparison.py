@@ -0,0 +1,43 @@
+import ezdxf
+import pytest
+import shapely
+from shapely.geometry import Polygon
+
+from dxf_comparison import _largest_polygon, load_dxf_polygon
+
+# Bow-tie with a dangling edge; make_valid returns GeometryCollection(MultiPolygon, LineString)
+BOWTIE_WITH_TAIL = [(0, 0), (4, 4), (4, 0), (0, 4), (0, 0), (-2, 0), (0, 0)]
+
+
+def test_largest_polygon_descends_into_nested_multipolygon():
+    repaired = shapely.make_valid(Polygon(BOWTIE_WITH_TAIL))
+    largest = _largest_polygon(repaired)
+    assert largest is not None
+    assert largest.geom_type == 'Polygon'
+    assert largest.area == 4.0
+
+
+def test_load_dxf_polygon_repairs_self_intersecting_outline(tmp_path):
+    dxf_path = tmp_path / "bowtie.dxf"
+    doc = ezdxf.new()
+    doc.modelspace().add_lwpolyline(BOWTIE_WITH_TAIL[:-1], close=True)
+    doc.saveas(dxf_path)
+
+    polygon = load_dxf_polygon(str(dxf_path))
+    assert polygon is not None
+    assert polygon.geom_type == 'Polygon'
+    assert polygon.area == 4.0
+
+
+@pytest.mark.parametrize("outline", [
+    Polygon([(0, 0), (5, 0), (5, 5), (0, 5)]),
+    Polygon([(0, 0), (6, 0), (6, 2), (3, 2), (3, 6), (0, 6)]),
+], ids=["square", "l_shape"])
+def test_load_dxf_polygon_ignores_dimension_lines(tmp_path, outline):
+    floor_plan_extractor = pytest.importorskip("floor_plan_extractor")
+    dxf_path = str(tmp_path / "floor_plan.dxf")
+    floor_plan_extractor.export_floor_plan_to_dxf(outline, dxf_path, add_dimensions=True)
+
+    polygon = load_dxf_polygon(dxf_path)
+    assert polygon is not None
+    assert polygon.area == pytest.approx(outline.area)